@@ -2,42 +2,97 @@
 This script monitors the login functionality of a website. It checks the login endpoint, sends alerts via email and Webex Teams, and logs the status.
 
 Functions:
+- load_env: Loads .env, reusing a cached parse while the file is unchanged.
 - validate_env_vars: Validates required environment variables.
 - exponential_backoff: Implements retry logic with exponential backoff.
-- send_email: Sends email alerts.
+- jittered_backoff: Exponential backoff with random jitter.
+- send_email: Sends email alerts over a cached SMTP connection.
 - send_webex_alert: Sends Webex Teams alerts.
-- write_log: Logs status changes.
-- read_last_status: Reads the last known status from a file.
-- write_last_status: Writes the current status to a file.
+- read_last_status: Reads the last known status of every URL from the state file.
+- write_last_status: Atomically writes the status of every URL to the state file.
+- read_url_kinds / write_url_kinds: Persist the login request shape learned per URL.
+- create_client: Creates an HTTP client backed by the shared connection pool.
+- scan_response: Streams a response body looking for the failure keyword.
 - check_login: Checks the login endpoint for success or failure.
-- debug_with_curl: Uses curl for debugging login requests.
+- monitor_url: Runs check_login with retries for a single URL.
+- build_curl_command: Builds a curl command reproducing a login request.
 - extract_csrf_token: Extracts CSRF token from response.
 - log_event: Structured JSON logging.
-- check_http_status: Check HTTP status code.
+- check_http_status: Check HTTP status code (debug pre-check, see HTTP_STATUS_PRECHECK).
+- send_pending_alerts: Sends the alerts queued during a run in one batch.
 - create_alert_message: Create detailed alert messages.
+- run_checks: Runs one monitoring pass over every URL.
+- report_critical_failure: Logs and alerts on an unhandled exception.
 """
 
-import requests
-import smtplib
+import httpx
 import os
+import sys
+import stat
 import time
 import logging
 import json
-from logging.handlers import RotatingFileHandler
-from email.mime.text import MIMEText
+import queue
+import atexit
+import glob
+import random
+import signal
+import threading
+import importlib.util
+import ipaddress
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-import subprocess
-import urllib3
-import traceback
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from dotenv import load_dotenv, dotenv_values
+
+# orjson is much faster than the stdlib json module; fall back when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# .env is looked up next to the script, like load_dotenv() does by default
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+ENV_CACHE_FILE = ENV_FILE + ".cache"
+
+def load_env():
+    try:
+        env_mtime = os.stat(ENV_FILE).st_mtime_ns
+    except OSError:
+        load_dotenv()  # No .env next to the script, fall back to the default search
+        return
+
+    # Reuse the cached parse while .env has not been modified
+    values = None
+    try:
+        with open(ENV_CACHE_FILE, "r") as f:
+            cache = json.load(f)
+        if cache["mtime"] == env_mtime:
+            values = cache["values"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if values is None:
+        values = {key: value for key, value in dotenv_values(ENV_FILE).items() if value is not None}
+        try:
+            # The cache holds the same secrets as .env, keep it private
+            fd = os.open(ENV_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"mtime": env_mtime, "values": values}, f)
+        except OSError:
+            pass
+
+    # Like load_dotenv(), never override variables already set in the environment
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Disable SSL verification warnings if verification is disabled
+# SSL certificate verification
 VERIFY_SSL = os.getenv("VERIFY_SSL", "true").lower() == "true"
-if not VERIFY_SSL:
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Support both single URL and multiple URLs
 LOGIN_URL = os.getenv("LOGIN_URL")
@@ -50,6 +105,9 @@ if LOGIN_URL:
 USERNAME = os.getenv("USERNAME")
 PASSWORD = os.getenv("PASSWORD")
 FAILED_KEYWORD = os.getenv("FAILED_KEYWORD", "Invalid credentials")
+FAILED_KEYWORD_BYTES = FAILED_KEYWORD.encode("utf-8")  # Matched against the raw body, no decoding
+RESPONSE_SCAN_LIMIT = int(os.getenv("RESPONSE_SCAN_LIMIT", 64 * 1024))  # Max body bytes scanned for FAILED_KEYWORD
+RESPONSE_CHUNK_SIZE = 8192
 
 # Email settings
 EMAIL_FROM = os.getenv("EMAIL_FROM")
@@ -65,19 +123,31 @@ WEBEX_WEBHOOK = os.getenv("WEBEX_WEBHOOK", "")
 # HTTP settings
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 10))
 SUCCESS_STATUS_CODES = list(map(int, os.getenv("SUCCESS_STATUS_CODES", "200,201,202,204").split(",")))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+HTTP_STATUS_PRECHECK = os.getenv("HTTP_STATUS_PRECHECK", "false").lower() == "true"  # Debug only: extra HEAD request per URL
 
 # File paths
 LOG_FILE = "logs/login_monitor.log"
-STATE_FILE = "last_status.txt"
+STATE_FILE = "state/last_status.json"
+URL_KIND_FILE = "state/url_kinds.json"
 
-# Ensure the logs directory exists
+# Ensure the logs and state directories exist
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+
+# Request shape learned per URL: {"payload": "json" | "form", "prefetch": bool}.
+# "prefetch" means the login page must be fetched first (CSRF token or cookies).
+URL_KINDS = {}
 
 # Retry settings
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
 
+# Seconds between checks when running continuously; 0 runs a single pass (cron mode)
+CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", 0))
+
 # Alert throttle timers
-last_alert_time = None
+last_alert_times = {}  # Per URL, so one URL's alert does not silence another's
+CRITICAL_ALERT_KEY = "critical"  # Throttle key for critical alerts in long-running mode
 ALERT_THROTTLE_PERIOD = timedelta(minutes=int(os.getenv("ALERT_THROTTLE_PERIOD", 10)))
 
 # Load log rotation settings from .env
@@ -88,139 +158,424 @@ LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 3))  # Default: 3 backups
 HOSTNAME = os.getenv("HOSTNAME", "unknown")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
 
-# Configure logging with RotatingFileHandler
-logging.basicConfig(level=logging.INFO, handlers=[
-    RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT),
+# Alert settings
+SEND_RECOVERY_ALERTS = os.getenv("SEND_RECOVERY_ALERTS", "false").lower() == "true"
+
+# Required settings, snapshotted once so validation does not hit the environment again
+REQUIRED_VARS = ["USERNAME", "PASSWORD", "EMAIL_FROM", "EMAIL_TO", "SMTP_SERVER", "SMTP_USERNAME", "SMTP_PASSWORD"]
+CONFIG = MappingProxyType({var: os.getenv(var) for var in REQUIRED_VARS})
+
+class AsyncRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that shifts the backup files on a worker thread.
+
+    On rollover the current log is renamed aside and a fresh file is opened
+    immediately; renaming the numbered backups happens on a worker thread,
+    which close() waits for. Files left aside by an interrupted run are
+    folded into the backups on the next shift.
+
+    The file size is tracked in memory instead of being re-checked with
+    stat/seek for every record, and when batch_queue is given the stream is
+    only flushed once that queue is drained, so a burst of records costs a
+    single write.
+    """
+
+    def __init__(self, *args, batch_queue=None, **kwargs):
+        self._batch_queue = batch_queue
+        self._size = 0
+        self._regular_file = True
+        super().__init__(*args, **kwargs)
+        # A single worker keeps rollovers in order. It is a daemon thread so it does
+        # not block interpreter shutdown, and close() joins it so no shift is lost.
+        self._rollover_jobs = queue.SimpleQueue()
+        self._rollover_thread = threading.Thread(target=self._rollover_worker, name="log-rotation", daemon=True)
+        self._rollover_thread.start()
+        if glob.glob(glob.escape(self.baseFilename) + ".*.rotating"):
+            self._rollover_jobs.put(True)
+
+    def _open(self):
+        stream = super()._open()
+        st = os.fstat(stream.fileno())
+        self._size = st.st_size
+        # See bpo-45401: never roll over anything other than regular files
+        self._regular_file = stat.S_ISREG(st.st_mode)
+        return stream
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            # maxBytes is a byte limit; non-ASCII text (e.g. alert emoji) takes several bytes per character
+            msg_size = len(msg.encode(self.stream.encoding or "utf-8", "replace"))
+            if self.maxBytes > 0 and self._regular_file and self._size + msg_size >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._size += msg_size
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        # Leave records buffered while more are waiting in the queue
+        if self._batch_queue is None or self._batch_queue.empty():
+            super().flush()
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0 and os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, f"{self.baseFilename}.{time.time_ns()}.rotating")
+            if self._rollover_thread.is_alive():
+                self._rollover_jobs.put(True)
+            else:
+                self._shift_backups()  # Worker already stopped, e.g. while closing
+        if not self.delay:
+            self.stream = self._open()
+
+    def _rollover_worker(self):
+        while self._rollover_jobs.get():
+            self._shift_backups()
+
+    def _shift_backups(self):
+        # Shift every file set aside so far, oldest first
+        pending_files = {}
+        for path in glob.glob(glob.escape(self.baseFilename) + ".*.rotating"):
+            set_aside_time = path[len(self.baseFilename) + 1:-len(".rotating")]
+            if set_aside_time.isdigit():
+                pending_files[int(set_aside_time)] = path
+
+        for _, pending in sorted(pending_files.items()):
+            try:
+                for i in range(self.backupCount - 1, 0, -1):
+                    sfn = self.rotation_filename(f"{self.baseFilename}.{i}")
+                    dfn = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+                    if os.path.exists(sfn):
+                        os.replace(sfn, dfn)
+                dfn = self.rotation_filename(self.baseFilename + ".1")
+                if os.path.exists(dfn):
+                    os.remove(dfn)
+                self.rotate(pending, dfn)
+            except OSError as e:
+                print(f"Log rotation failed: {e}", file=sys.stderr)
+
+    def close(self):
+        if self._rollover_thread.is_alive():
+            self._rollover_jobs.put(False)
+            self._rollover_thread.join()
+        super().close()
+
+# Configure logging: records are formatted by the QueueHandler and written to the
+# rotating log file and console by a background listener thread
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    AsyncRotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, batch_queue=log_queue),
     logging.StreamHandler()
+)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", handlers=[
+    QueueHandler(log_queue)
 ])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger("LoginMonitor")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # httpx logs every request at INFO
+
+# Connection pool shared by every client so TCP/TLS connections are reused. With
+# the h2 package installed, checks against the same host are multiplexed over a
+# single HTTP/2 connection.
+def _create_transport(proxy=None):
+    return httpx.HTTPTransport(
+        http2=importlib.util.find_spec("h2") is not None,
+        verify=VERIFY_SSL,  # Use configurable SSL verification
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=HTTP_POOL_SIZE),
+        proxy=proxy
+    )
+
+def _create_proxy_mounts():
+    # httpx ignores HTTP(S)_PROXY/ALL_PROXY/NO_PROXY once a transport is passed in,
+    # so build the equivalent mounts here, following httpx's own rules
+    from urllib.request import getproxies
+    proxy_info = getproxies()
+    mounts = {}
+
+    for scheme in ("http", "https", "all"):
+        proxy = proxy_info.get(scheme)
+        if proxy:
+            mounts[f"{scheme}://"] = _create_transport(proxy if "://" in proxy else f"http://{proxy}")
+
+    for hostname in (host.strip() for host in proxy_info.get("no", "").split(",")):
+        if hostname == "*":
+            return {}
+        elif "://" in hostname:
+            mounts[hostname] = None
+        elif _is_ip_address(hostname, ipaddress.IPv4Address) or hostname.lower() == "localhost":
+            mounts[f"all://{hostname}"] = None
+        elif _is_ip_address(hostname, ipaddress.IPv6Address):
+            mounts[f"all://[{hostname}]"] = None
+        elif hostname:
+            mounts[f"all://*{hostname}"] = None  # Domains, including host:port entries
+
+    return mounts
+
+def _is_ip_address(hostname, address_type):
+    # NO_PROXY entries may be CIDR ranges such as 192.168.0.0/16
+    try:
+        address_type(hostname.split("/")[0])
+    except ValueError:
+        return False
+    return True
+
+HTTP_TRANSPORT = _create_transport()
+HTTP_PROXY_MOUNTS = _create_proxy_mounts()
+
+def create_client():
+    # Clients keep their own cookies but share HTTP_TRANSPORT and the proxy transports.
+    # Do not close them: closing a client also closes its transports.
+    return httpx.Client(
+        transport=HTTP_TRANSPORT,
+        mounts=HTTP_PROXY_MOUNTS,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True
+    )
+
+CLIENT = create_client()
+
+# Alert webhooks always verify TLS: VERIFY_SSL only relaxes checks for the monitored sites
+WEBHOOK_CLIENT = httpx.Client(timeout=REQUEST_TIMEOUT)
 
 # Validate environment variables
 def validate_env_vars():
-    required_vars = ["USERNAME", "PASSWORD", "EMAIL_FROM", "EMAIL_TO", "SMTP_SERVER", "SMTP_USERNAME", "SMTP_PASSWORD"]
-    
     # Ensure at least one login URL is defined
-    if not LOGIN_URL and not any(url.strip() for url in LOGIN_URLS):
+    # LOGIN_URLS already holds LOGIN_URL when it is set; a blank value is not a URL
+    if not any(url.strip() for url in LOGIN_URLS):
         logger.error("No login URLs defined. Set either LOGIN_URL or LOGIN_URLS environment variable.")
         exit(1)
         
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    missing_vars = [var for var in REQUIRED_VARS if not CONFIG[var]]
     if missing_vars:
         logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
         exit(1)
 
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+def loads_json(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Timestamp format used in alert messages
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(seconds):
+    # Events logged within the same second reuse the formatted string
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(seconds))
+
 # Structured JSON logging
 def log_event(event_type, data):
     log_entry = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _iso_timestamp(int(time.time())),
         "hostname": HOSTNAME,
         "environment": ENVIRONMENT,
         "event": event_type,
         **data
     }
-    logger.info(json.dumps(log_entry))
+    logger.info(dumps_json(log_entry))
 
 # Exponential backoff retry logic
 def exponential_backoff(attempt):
     return min(2 ** attempt, 60)  # Cap delay at 60 seconds
 
+def jittered_backoff(attempt):
+    # Up to 25% random jitter so URLs failing together do not retry in lockstep
+    delay = exponential_backoff(attempt)
+    return delay + random.uniform(0, delay * 0.25)
+
+# Set by SIGTERM/SIGINT; backoff waits on it so shutdown does not sit out a delay
+STOP_EVENT = threading.Event()
+
+def handle_stop_signal(signum, frame):
+    # Only set the event: logging here could deadlock on the log queue's lock
+    # if the signal arrives while the main thread is inside a log call
+    STOP_EVENT.set()
+
+# Cached SMTP connection, opened on the first alert and reused afterwards
+_smtp_conn = None
+
+def _get_smtp():
+    global _smtp_conn
+    import smtplib
+    if _smtp_conn is not None:
+        try:
+            if _smtp_conn.noop()[0] == 250:
+                return _smtp_conn
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_smtp()
+
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=REQUEST_TIMEOUT)
+    try:
+        server.starttls()
+        server.login(SMTP_USERNAME, SMTP_PASSWORD)
+    except smtplib.SMTPException:
+        server.close()
+        raise
+    _smtp_conn = server
+    return server
+
+def _close_smtp():
+    global _smtp_conn
+    if _smtp_conn is None:
+        return
+    import smtplib
+    try:
+        _smtp_conn.quit()
+    except (smtplib.SMTPException, OSError):
+        _smtp_conn.close()
+    finally:
+        _smtp_conn = None
+
+atexit.register(_close_smtp)
+
 def send_email(subject, body):
+    # Imported lazily: only runs that actually send alerts pay for these modules
+    import smtplib
+    from email.mime.text import MIMEText
+
     try:
         msg = MIMEText(body)
         msg['Subject'] = subject
         msg['From'] = EMAIL_FROM
         msg['To'] = EMAIL_TO
 
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        try:
+            _get_smtp().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server may drop an idle connection between noop() and send
+            _close_smtp()
+            _get_smtp().send_message(msg)
 
         log_event("email_sent", {"subject": subject})
     except smtplib.SMTPException as e:
         logger.error(f"Email error: {e}")
+        _close_smtp()
         raise
 
 # Make Webex alerts optional
 if WEBEX_WEBHOOK:
     def send_webex_alert(body):
         try:
-            response = requests.post(WEBEX_WEBHOOK, json={"text": body}, timeout=REQUEST_TIMEOUT)
+            response = WEBHOOK_CLIENT.post(WEBEX_WEBHOOK, json={"text": body})
             if response.status_code == 200:
                 log_event("webex_sent", {"status_code": response.status_code})
             else:
                 logger.error(f"Webex alert failed with status code {response.status_code}: {response.text}")
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Webex error: {e}")
 else:
     def send_webex_alert(body):
         logger.info("Webex alert skipped as WEBEX_WEBHOOK is not configured.")
 
-def write_log(status, detail=""):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILE, "a") as f:
-        f.write(f"{timestamp} - {status} - {detail}\n")
+def _read_json_file(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}
+    if not data.strip():
+        return {}
+    try:
+        content = loads_json(data)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable state file {path}: {e}")
+        return {}
+    return content if isinstance(content, dict) else {}
+
+def _write_json_file(path, content):
+    # Write to a temporary file and swap it in so a crash never leaves a partial file
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(dumps_json(content).encode("utf-8"))  # Always UTF-8, whatever the locale
+    os.replace(tmp_file, path)
 
 def read_last_status():
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r") as f:
-            return f.read().strip()
-    return "success"
-
-def write_last_status(status):
-    with open(STATE_FILE, "w") as f:
-        f.write(status)
+    # Last known status per URL; URLs not listed are treated as "success"
+    return _read_json_file(STATE_FILE)
+
+def write_last_status(statuses):
+    _write_json_file(STATE_FILE, statuses)
+
+def read_url_kinds():
+    # Drop malformed entries (hand-edited or stale files); those URLs are simply probed again
+    return {
+        url: kind for url, kind in _read_json_file(URL_KIND_FILE).items()
+        if isinstance(kind, dict)
+        and kind.get("payload") in ("json", "form")
+        and isinstance(kind.get("prefetch"), bool)
+    }
 
-def debug_with_curl(url, payload, headers):
+def write_url_kinds(url_kinds):
+    _write_json_file(URL_KIND_FILE, url_kinds)
+
+def _redact_password(text):
+    from urllib.parse import quote_plus
+    if not PASSWORD:
+        return text
+    for secret in {PASSWORD, quote_plus(PASSWORD), json.dumps(PASSWORD)[1:-1]}:
+        text = text.replace(secret, "********")
+    return text
+
+def build_curl_command(request):
+    # Equivalent curl command for manual reproduction; never executed
+    import shlex
+    curl_command = ["curl", "-X", request.method, str(request.url)]
+    for key, value in request.headers.items():
+        curl_command.extend(["-H", f"{key}: {value}"])
+    if request.content:
+        # Redact before quoting: shlex.quote rewrites characters such as ' inside the password
+        curl_command.extend(["-d", _redact_password(request.content.decode("utf-8", "replace"))])
+    if not VERIFY_SSL:
+        curl_command.append("-k")
+    return " ".join(shlex.quote(arg) for arg in curl_command)
+
+# Look for common CSRF token input fields
+CSRF_FIELD_NAMES = ["csrf_token", "_token", "csrf", "CSRF"]
+
+def _find_csrf_input_value(html):
     try:
-        # Construct the curl command
-        curl_command = [
-            "curl", "-X", "POST", url,
-            "-d", f"username={payload['username']}&password={payload['password']}"
-        ]
-
-        # Add headers to the curl command
-        for key, value in headers.items():
-            curl_command.extend(["-H", f"{key}: {value}"])
-            
-        # Add SSL verification flag
-        if not VERIFY_SSL:
-            curl_command.append("-k")
-
-        # Execute the curl command and capture the output
-        result = subprocess.run(curl_command, capture_output=True, text=True)
-        logger.debug(f"Curl command: {' '.join(curl_command)}")
-        logger.debug(f"Curl response: {result.stdout}")
-        logger.debug(f"Curl error (if any): {result.stderr}")
-        
-        log_event("curl_debug", {
-            "url": url,
-            "exit_code": result.returncode,
-            "stdout_length": len(result.stdout),
-            "stderr_length": len(result.stderr)
-        })
-    except Exception as e:
-        logger.error(f"Curl debugging failed: {e}")
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        # Fall back to the slower pure-Python parser
+        from bs4 import BeautifulSoup
+        csrf_input = BeautifulSoup(html, 'html.parser').find('input', {'name': CSRF_FIELD_NAMES})
+        return csrf_input.get('value') if csrf_input else None
+
+    csrf_input = HTMLParser(html).css_first(", ".join(f'input[name="{name}"]' for name in CSRF_FIELD_NAMES))
+    return csrf_input.attributes.get('value') if csrf_input else None
 
-def extract_csrf_token(session, response):
+def extract_csrf_token(client, response):
     # Try from cookies first
-    csrf_token = session.cookies.get("XSRF-TOKEN")
+    csrf_token = client.cookies.get("XSRF-TOKEN")
     
     # If not in cookies, try to extract from HTML content
     if not csrf_token and "text/html" in response.headers.get("Content-Type", ""):
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # Look for common CSRF token input fields
-            csrf_input = soup.find('input', {'name': ['csrf_token', '_token', 'csrf', 'CSRF']})
-            if csrf_input and csrf_input.get('value'):
-                csrf_token = csrf_input.get('value')
+            csrf_token = _find_csrf_input_value(response.text)
+            if csrf_token:
                 logger.info(f"Extracted CSRF token from HTML form: {csrf_token[:5]}...")
         except ImportError:
-            logger.warning("BeautifulSoup not installed, skipping HTML CSRF extraction")
+            logger.warning("Neither selectolax nor BeautifulSoup installed, skipping HTML CSRF extraction")
     
     if csrf_token:
-        log_event("csrf_token_found", {"method": "cookies" if session.cookies.get("XSRF-TOKEN") else "html"})
+        log_event("csrf_token_found", {"method": "cookies" if client.cookies.get("XSRF-TOKEN") else "html"})
     else:
         logger.debug("No CSRF token found")
     
@@ -228,7 +583,7 @@ def extract_csrf_token(session, response):
 
 def check_http_status(url):
     try:
-        response = requests.head(url, timeout=REQUEST_TIMEOUT, verify=VERIFY_SSL)
+        response = CLIENT.head(url)
         log_event("http_status_check", {"url": url, "status_code": response.status_code})
         return response.status_code
     except Exception as e:
@@ -236,15 +591,49 @@ def check_http_status(url):
         log_event("http_status_failed", {"url": url, "error": str(e)})
         return None
 
-def check_login(url):
+def scan_response(response):
+    # Stop reading at the first keyword hit or after RESPONSE_SCAN_LIMIT bytes;
+    # returns whether the keyword was found and the first 500 bytes for debugging
+    overlap = len(FAILED_KEYWORD_BYTES) - 1
+    window = b""
+    head = b""
+    bytes_read = 0
+    found = False
+
+    try:
+        for chunk in response.iter_bytes(chunk_size=RESPONSE_CHUNK_SIZE):
+            if len(head) < 500:
+                head += chunk[:500 - len(head)]
+            # Keep the tail of the previous chunk so a keyword split across chunks still matches
+            window = (window[-overlap:] if overlap > 0 else b"") + chunk
+            if FAILED_KEYWORD_BYTES in window:
+                found = True
+                break
+            bytes_read += len(chunk)
+            if bytes_read >= RESPONSE_SCAN_LIMIT:
+                break
+    finally:
+        response.close()
+
+    return found, head
+
+def check_login(url, client):
     start_time = time.time()
-    session = requests.Session()
-    session.verify = VERIFY_SSL  # Use configurable SSL verification
+    
+    url_kind = URL_KINDS.get(url)
+    prefetched = url_kind is None or url_kind["prefetch"]
     
     try:
-        # Step 1: Fetch the CSRF token if available
-        initial_response = session.get(url, timeout=REQUEST_TIMEOUT)
-        csrf_token = extract_csrf_token(session, initial_response)
+        # Step 1: Fetch the CSRF token if available, unless this URL is known not to need it
+        csrf_token = None
+        if prefetched:
+            initial_response = client.get(url)
+            csrf_token = extract_csrf_token(client, initial_response)
+            url_kind = {
+                "payload": "json" if "application/json" in initial_response.headers.get("Content-Type", "") else "form",
+                "prefetch": bool(csrf_token or client.cookies)
+            }
+            URL_KINDS[url] = url_kind
 
         # Step 2: Prepare the login payload and headers
         payload = {
@@ -258,7 +647,7 @@ def check_login(url):
             headers["X-XSRF-TOKEN"] = csrf_token
 
         # Step 3: Determine content type (JSON or form data)
-        if "application/json" in initial_response.headers.get("Content-Type", ""):
+        if url_kind["payload"] == "json":
             headers["Content-Type"] = "application/json"
             payload = {
                 "username": USERNAME,
@@ -268,26 +657,40 @@ def check_login(url):
             if csrf_token:
                 payload["csrf_token"] = csrf_token
                 
-            response = session.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            request = client.build_request("POST", url, json=payload, headers=headers)
         else:
-            response = session.post(url, data=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            request = client.build_request("POST", url, data=payload, headers=headers)
+        response = client.send(request, stream=True)
+
+        # Step 4: Scan the streamed body for the failure keyword
+        failed_keyword_found, response_head = scan_response(response)
 
         # Calculate response time
         end_time = time.time()
         response_time = end_time - start_time
         
-        # Step 4: Check the response for success or failure
-        if FAILED_KEYWORD in response.text or response.status_code not in SUCCESS_STATUS_CODES:
-            logger.debug(f"Response content: {response.text[:500]}...")  # Log first 500 chars only
-            debug_with_curl(url, payload, headers)  # Add curl debugging here
+        if response.status_code >= 500:
+            logger.warning(f"Site at {url} appears to be down with status {response.status_code}")
+            log_event("http_status_failed", {"url": url, "status_code": response.status_code})
+
+        # Step 5: Check the response for success or failure
+        if failed_keyword_found or response.status_code not in SUCCESS_STATUS_CODES:
+            logger.debug(f"Response content: {response_head.decode('utf-8', 'replace')}...")  # Log first 500 bytes only
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Login request headers: {dict(response.request.headers)}")
+                logger.debug(f"Curl command: {build_curl_command(response.request)}")
             
             log_event("login_check_failed", {
                 "url": url,
                 "status_code": response.status_code,
                 "response_time": round(response_time, 2),
-                "failed_keyword_found": FAILED_KEYWORD in response.text
+                "failed_keyword_found": failed_keyword_found
             })
             
+            if not prefetched:
+                # The cached request shape may be stale; probe the login page on the next attempt
+                URL_KINDS.pop(url, None)
+
             return "login_failed", f"Status {response.status_code}", response_time
             
         log_event("login_check_success", {
@@ -298,32 +701,60 @@ def check_login(url):
         
         return "success", "Login OK", response_time
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         end_time = time.time()
         response_time = end_time - start_time
         logger.error("Request timed out")
         log_event("login_check_timeout", {"url": url, "timeout": REQUEST_TIMEOUT})
         return "unreachable", "Request timed out", response_time
         
-    except requests.exceptions.ConnectionError:
+    except httpx.NetworkError:
         end_time = time.time()
         response_time = end_time - start_time
         logger.error("Connection error")
         log_event("login_check_connection_error", {"url": url})
         return "unreachable", "Connection error", response_time
         
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
         end_time = time.time()
         response_time = end_time - start_time
         logger.error(f"Request exception: {e}")
         log_event("login_check_request_exception", {"url": url, "error": str(e)})
         return "unreachable", str(e), response_time
 
-def should_send_alert():
-    global last_alert_time
+def monitor_url(url):
+    log_event("checking_url", {"url": url})
+
+    # Optional HEAD pre-check; check_login already reports server errors
+    if HTTP_STATUS_PRECHECK:
+        http_status = check_http_status(url)
+        if http_status is None or http_status >= 500:
+            logger.warning(f"Site at {url} appears to be down with status {http_status}")
+
+    current_status = None
+    detail = ""
+    response_time = None
+
+    # Share one client across retries for this URL
+    client = create_client()
+
+    for attempt in range(MAX_RETRIES):
+        current_status, detail, response_time = check_login(url, client)
+        if current_status == "success" or attempt == MAX_RETRIES - 1:
+            break
+        delay = jittered_backoff(attempt)
+        logger.warning(f"Attempt {attempt + 1} for {url} failed. Retrying in {delay:.1f} seconds...")
+        if STOP_EVENT.wait(delay):
+            break  # Shutting down, report the last result
+
+    return current_status, detail, response_time
+
+def should_send_alert(key):
+    # key is the URL, or CRITICAL_ALERT_KEY for critical failures
     now = datetime.now()
+    last_alert_time = last_alert_times.get(key)
     if last_alert_time is None or now - last_alert_time > ALERT_THROTTLE_PERIOD:
-        last_alert_time = now
+        last_alert_times[key] = now
         return True
     return False
 
@@ -334,10 +765,20 @@ def retry_alert(func, *args, max_retries=3):
             return
         except Exception as e:
             logger.error(f"Alert attempt {attempt + 1} failed: {e}")
-            time.sleep(exponential_backoff(attempt))
+            STOP_EVENT.wait(jittered_backoff(attempt))
             
+def send_pending_alerts(pending_emails, pending_webex):
+    # Emails share the cached SMTP session and Webex posts reuse the pooled HTTP connection
+    for subject, body in pending_emails:
+        retry_alert(send_email, subject, body)
+    for body in pending_webex:
+        retry_alert(send_webex_alert, body)
+
+    if pending_emails or pending_webex:
+        log_event("alerts_dispatched", {"emails": len(pending_emails), "webex": len(pending_webex)})
+
 def create_alert_message(status, url, detail, response_time=None):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime(TIMESTAMP_FORMAT)
     
     # Add response time information if available
     performance_info = ""
@@ -356,81 +797,126 @@ Time: {timestamp}
 This alert was generated by the automated login monitoring system.
 """
 
-if __name__ == "__main__":
-    try:
-        # Validate environment variables first
-        validate_env_vars()
-        
-        log_event("monitor_started", {
-            "version": "1.1.0",
-            "urls_count": len(LOGIN_URLS)
-        })
-        
-        for url in LOGIN_URLS:
-            if not url.strip():  # Skip empty URLs
-                continue
-                
-            url = url.strip()  # Remove whitespace
-            log_event("checking_url", {"url": url})
-            
-            # First check if site is accessible at all
-            http_status = check_http_status(url)
-            if http_status is None or http_status >= 500:
-                logger.warning(f"Site at {url} appears to be down with status {http_status}")
-                
-            current_status = None
-            detail = ""
-            response_time = None
-            
-            for attempt in range(MAX_RETRIES):
-                current_status, detail, response_time = check_login(url)
-                if current_status == "success":
-                    break
-                delay = exponential_backoff(attempt)
-                logger.warning(f"Attempt {attempt + 1} for {url} failed. Retrying in {delay} seconds...")
-                time.sleep(delay)
-
-            previous_status = read_last_status()
-            write_log(current_status, detail)
-
-            if current_status != previous_status and should_send_alert():
-                alert_msg = create_alert_message(current_status, url, detail, response_time)
-                
-                if current_status == "login_failed":
-                    retry_alert(send_email, "Login Failed Alert", alert_msg)
-                    retry_alert(send_webex_alert, alert_msg)
-
-                elif current_status == "unreachable":
-                    retry_alert(send_email, "Site Unreachable Alert", alert_msg)
-                    retry_alert(send_webex_alert, alert_msg)
-
-                elif current_status == "success":
-                    if os.getenv("SEND_RECOVERY_ALERTS", "false").lower() == "true":
-                        retry_alert(send_email, "Login Monitor Recovery", alert_msg)
-                        retry_alert(send_webex_alert, alert_msg)
-                    logger.info("Login restored.")
-            else:
-                logger.info(f"No status change or alert throttled for {url}.")
+def run_checks(urls, last_statuses):
+    # One monitoring pass: check every URL, then update last_statuses and send alerts
+    if not urls:
+        return
+
+    known_url_kinds = dict(URL_KINDS)
 
-            write_last_status(current_status)
+    # Check all URLs concurrently; the work is network-bound
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(32, len(urls))) as executor:
+        futures = {executor.submit(monitor_url, url): url for url in urls}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    if URL_KINDS != known_url_kinds:
+        write_url_kinds(URL_KINDS)
+
+    # Alerts are queued during the loop and sent together afterwards
+    pending_emails = []
+    pending_webex = []
+
+    for url in urls:
+        current_status, detail, response_time = results[url]
+
+        previous_status = last_statuses.get(url, "success")
+        logger.info("%s - %s - %s", current_status, detail, url)
+
+        if current_status == previous_status:
+            logger.info(f"No status change for {url}.")
+
+        elif not should_send_alert(url):
+            # Keep the previous status so the change is alerted once the throttle expires
+            logger.info(f"Alert throttled for {url}.")
+            continue
+
+        else:
+            alert_msg = create_alert_message(current_status, url, detail, response_time)
             
-    except Exception as e:
-        error_details = traceback.format_exc()
-        logger.critical(f"Unhandled exception in main process: {e}\n{error_details}")
-        
-        # Send alert about critical failure
-        critical_alert = f"""
+            if current_status == "login_failed":
+                pending_emails.append(("Login Failed Alert", alert_msg))
+                pending_webex.append(alert_msg)
+
+            elif current_status == "unreachable":
+                pending_emails.append(("Site Unreachable Alert", alert_msg))
+                pending_webex.append(alert_msg)
+
+            elif current_status == "success":
+                if SEND_RECOVERY_ALERTS:
+                    pending_emails.append(("Login Monitor Recovery", alert_msg))
+                    pending_webex.append(alert_msg)
+                logger.info("Login restored.")
+
+        last_statuses[url] = current_status
+
+    write_last_status(last_statuses)
+    send_pending_alerts(pending_emails, pending_webex)
+
+def report_critical_failure(e, send_alert=True):
+    # Must be called from an except block so the traceback is available
+    import traceback
+    error_details = traceback.format_exc()
+    logger.critical(f"Unhandled exception in main process: {e}\n{error_details}")
+
+    if not send_alert:
+        logger.info("Critical alert throttled.")
+        return
+    
+    # Send alert about critical failure
+    critical_alert = f"""
 🚨 CRITICAL: Login Monitor Failed
 Error: {e}
 Environment: {ENVIRONMENT}
 Host: {HOSTNAME}
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Time: {time.strftime(TIMESTAMP_FORMAT)}
 
 Stack Trace:
 {error_details}
 
 The login monitor has encountered a critical error and may not be functioning properly.
 """
-        retry_alert(send_email, "CRITICAL: Login Monitor Failed", critical_alert)
-        retry_alert(send_webex_alert, critical_alert)
-    
\ No newline at end of file
+    retry_alert(send_email, "CRITICAL: Login Monitor Failed", critical_alert)
+    retry_alert(send_webex_alert, critical_alert)
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+    signal.signal(signal.SIGINT, handle_stop_signal)
+
+    try:
+        # Validate environment variables first
+        validate_env_vars()
+        
+        log_event("monitor_started", {
+            "version": "1.1.0",
+            "urls_count": len(LOGIN_URLS),
+            "check_interval": CHECK_INTERVAL
+        })
+        
+        urls = [url.strip() for url in LOGIN_URLS if url.strip()]  # Skip empty URLs
+
+        # State is loaded once and kept in memory between passes
+        last_statuses = read_last_status()
+        URL_KINDS.update(read_url_kinds())
+
+        # Run once (cron) or keep running every CHECK_INTERVAL seconds, reusing the
+        # HTTP connections, SMTP session and log listener between passes
+        while True:
+            try:
+                run_checks(urls, last_statuses)
+            except Exception as e:
+                if CHECK_INTERVAL <= 0:
+                    raise
+                # Keep the monitor running; a persistent fault alerts once per throttle period
+                report_critical_failure(e, send_alert=should_send_alert(CRITICAL_ALERT_KEY))
+
+            if CHECK_INTERVAL <= 0 or STOP_EVENT.wait(CHECK_INTERVAL):
+                break
+
+        if STOP_EVENT.is_set():
+            logger.info("Stop signal received, stopping.")
+        log_event("monitor_stopped", {})
+            
+    except Exception as e:
+        report_critical_failure(e)
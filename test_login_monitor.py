@@ -4,3 +4,336 @@ from login_monitor import check_login
 def test_check_login():
     # Placeholder test for check_login function
     assert callable(check_login), "check_login should be callable"
+
+def test_create_client_shares_connection_pool():
+    from login_monitor import create_client, HTTP_TRANSPORT
+    first, second = create_client(), create_client()
+    assert first._transport is HTTP_TRANSPORT
+    assert second._transport is HTTP_TRANSPORT
+    assert first.cookies is not second.cookies
+
+def test_send_email_reuses_smtp_connection(monkeypatch):
+    import login_monitor
+
+    class FakeSMTP:
+        instances = []
+
+        def __init__(self, *args, **kwargs):
+            self.sent = []
+            FakeSMTP.instances.append(self)
+
+        def starttls(self):
+            pass
+
+        def login(self, username, password):
+            pass
+
+        def noop(self):
+            return (250, b"OK")
+
+        def send_message(self, msg):
+            self.sent.append(msg["Subject"])
+
+        def quit(self):
+            pass
+
+    monkeypatch.setattr("smtplib.SMTP", FakeSMTP)
+    login_monitor._close_smtp()
+    login_monitor.send_email("First", "body")
+    login_monitor.send_email("Second", "body")
+    login_monitor._close_smtp()
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].sent == ["First", "Second"]
+
+def test_load_env_reuses_cache_until_env_changes(tmp_path, monkeypatch):
+    import login_monitor
+    env_file = tmp_path / ".env"
+    env_file.write_text("MONITOR_TEST_VAR=first\n")
+    monkeypatch.setattr(login_monitor, "ENV_FILE", str(env_file))
+    monkeypatch.setattr(login_monitor, "ENV_CACHE_FILE", str(env_file) + ".cache")
+    monkeypatch.delenv("MONITOR_TEST_VAR", raising=False)
+
+    login_monitor.load_env()
+    assert login_monitor.os.environ["MONITOR_TEST_VAR"] == "first"
+    assert (tmp_path / ".env.cache").exists()
+
+    # A cache hit must not re-parse .env
+    monkeypatch.delenv("MONITOR_TEST_VAR")
+    monkeypatch.setattr(login_monitor, "dotenv_values", None)
+    login_monitor.load_env()
+    assert login_monitor.os.environ["MONITOR_TEST_VAR"] == "first"
+
+def test_async_rotating_file_handler_rolls_over(tmp_path):
+    import logging
+    from login_monitor import AsyncRotatingFileHandler
+    log_file = tmp_path / "test.log"
+    handler = AsyncRotatingFileHandler(str(log_file), maxBytes=50, backupCount=2)
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "x" * 30, None, None)
+    for _ in range(4):
+        handler.emit(record)
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["test.log", "test.log.1", "test.log.2"]
+
+def test_async_rotating_file_handler_defers_flush_while_queue_has_records(tmp_path):
+    import logging
+    import queue
+    from login_monitor import AsyncRotatingFileHandler
+    log_file = tmp_path / "test.log"
+    pending = queue.Queue()
+    pending.put("waiting record")
+    handler = AsyncRotatingFileHandler(str(log_file), batch_queue=pending)
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "buffered", None, None)
+    handler.emit(record)
+    assert log_file.read_text() == ""
+
+    pending.get()
+    handler.emit(record)
+    assert log_file.read_text() == "buffered\nbuffered\n"
+    handler.close()
+
+class FakeStreamedResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def iter_bytes(self, chunk_size):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+def test_scan_response_finds_keyword_split_across_chunks(monkeypatch):
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "FAILED_KEYWORD_BYTES", b"Invalid credentials")
+    response = FakeStreamedResponse([b"<p>Invalid cre", b"dentials</p>", b"never read"])
+    found, head = login_monitor.scan_response(response)
+
+    assert found
+    assert head == b"<p>Invalid credentials</p>"
+    assert response.consumed == 2
+    assert response.closed
+
+def test_scan_response_stops_at_scan_limit(monkeypatch):
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "RESPONSE_SCAN_LIMIT", 16)
+    response = FakeStreamedResponse([b"a" * 10, b"b" * 10, b"Invalid credentials"])
+    found, _ = login_monitor.scan_response(response)
+
+    assert not found
+    assert response.consumed == 2
+
+def test_build_curl_command_redacts_password(monkeypatch):
+    import httpx
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "PASSWORD", "s3cret&pw")
+    request = httpx.Request(
+        "POST", "https://example.com/login",
+        data={"username": "admin", "password": "s3cret&pw"},
+    )
+    command = login_monitor.build_curl_command(request)
+
+    assert command.startswith("curl -X POST https://example.com/login")
+    assert "username=admin" in command
+    assert "s3cret" not in command
+
+def test_dumps_json_matches_stdlib_with_and_without_orjson(monkeypatch):
+    import json
+    import login_monitor
+    entry = {"event": "login_check_success", "url": "https://example.com/ü", "response_time": 0.25}
+    assert json.loads(login_monitor.dumps_json(entry)) == entry
+
+    monkeypatch.setattr(login_monitor, "orjson", None)
+    assert json.loads(login_monitor.dumps_json(entry)) == entry
+
+def test_last_status_round_trip_keeps_every_url(tmp_path, monkeypatch):
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "STATE_FILE", str(tmp_path / "last_status.json"))
+    assert login_monitor.read_last_status() == {}
+
+    statuses = {"https://a.example/login": "success", "https://b.example/länder/login": "login_failed"}
+    login_monitor.write_last_status(statuses)
+
+    assert login_monitor.read_last_status() == statuses
+    assert [p.name for p in tmp_path.iterdir()] == ["last_status.json"]
+
+def test_find_csrf_input_value_with_and_without_selectolax(monkeypatch):
+    import sys
+    from login_monitor import _find_csrf_input_value
+    html = '<form><input name="username"><input type="hidden" name="_token" value="abc123"></form>'
+    assert _find_csrf_input_value(html) == "abc123"
+    assert _find_csrf_input_value("<form><input name='username'></form>") is None
+
+    pytest.importorskip("bs4")
+    monkeypatch.setitem(sys.modules, "selectolax.parser", None)
+    assert _find_csrf_input_value(html) == "abc123"
+
+def test_check_login_skips_login_page_once_request_shape_is_known(monkeypatch):
+    import httpx
+    import login_monitor
+    url = "https://example.com/login"
+    requests_seen = []
+    login_ok = True
+
+    def handler(request):
+        requests_seen.append(request.method)
+        if request.method == "GET":
+            return httpx.Response(200, headers={"Content-Type": "application/json"}, json={})
+        return httpx.Response(200, text="Welcome" if login_ok else "Invalid credentials")
+
+    monkeypatch.setattr(login_monitor, "URL_KINDS", {})
+    monkeypatch.setattr(login_monitor, "FAILED_KEYWORD_BYTES", b"Invalid credentials")
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert login_monitor.check_login(url, client)[0] == "success"
+    assert login_monitor.URL_KINDS[url] == {"payload": "json", "prefetch": False}
+    assert login_monitor.check_login(url, client)[0] == "success"
+    assert requests_seen == ["GET", "POST", "POST"]
+
+    # A failure with the cached shape forces a fresh probe on the next attempt
+    login_ok = False
+    assert login_monitor.check_login(url, client)[0] == "login_failed"
+    assert url not in login_monitor.URL_KINDS
+
+def test_jittered_backoff_stays_within_25_percent():
+    from login_monitor import jittered_backoff
+    for attempt in range(8):
+        base = min(2 ** attempt, 60)
+        assert base <= jittered_backoff(attempt) <= base * 1.25
+
+def test_async_rotating_file_handler_folds_in_leftover_rotating_files(tmp_path):
+    import logging
+    from login_monitor import AsyncRotatingFileHandler
+    log_file = tmp_path / "test.log"
+    (tmp_path / "test.log.100.rotating").write_text("older\n")
+    (tmp_path / "test.log.200.rotating").write_text("newer\n")
+    handler = AsyncRotatingFileHandler(str(log_file), maxBytes=1000, backupCount=3)
+    handler.emit(logging.LogRecord("test", logging.INFO, __file__, 0, "current", None, None))
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["test.log", "test.log.1", "test.log.2"]
+    assert (tmp_path / "test.log.1").read_text() == "newer\n"
+    assert (tmp_path / "test.log.2").read_text() == "older\n"
+
+def test_async_rotating_file_handler_rolls_over_after_close(tmp_path):
+    import logging
+    from login_monitor import AsyncRotatingFileHandler
+    log_file = tmp_path / "test.log"
+    handler = AsyncRotatingFileHandler(str(log_file), maxBytes=50, backupCount=2)
+    handler.close()  # Stops the worker, as at interpreter exit
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "x" * 30, None, None)
+    for _ in range(4):
+        handler.emit(record)
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["test.log", "test.log.1", "test.log.2"]
+
+def test_async_rotating_file_handler_counts_encoded_bytes(tmp_path):
+    import logging
+    from login_monitor import AsyncRotatingFileHandler
+    log_file = tmp_path / "test.log"
+    handler = AsyncRotatingFileHandler(str(log_file), maxBytes=100, backupCount=1, encoding="utf-8")
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "🚨" * 10, None, None)
+    for _ in range(4):
+        handler.emit(record)
+    handler.close()
+
+    assert log_file.stat().st_size <= 100
+    assert (tmp_path / "test.log.1").stat().st_size <= 100
+
+def test_run_checks_alerts_every_url_that_changes_state(monkeypatch):
+    import login_monitor
+    sent = []
+    monkeypatch.setattr(login_monitor, "last_alert_times", {})
+    monkeypatch.setattr(login_monitor, "monitor_url", lambda url: ("login_failed", "Status 200", 0.1))
+    monkeypatch.setattr(login_monitor, "write_last_status", lambda statuses: None)
+    monkeypatch.setattr(login_monitor, "send_pending_alerts", lambda emails, webex: sent.extend(emails))
+
+    urls = ["https://a.example/login", "https://b.example/login"]
+    last_statuses = {}
+    login_monitor.run_checks(urls, last_statuses)
+
+    assert [subject for subject, _ in sent] == ["Login Failed Alert", "Login Failed Alert"]
+    assert last_statuses == {url: "login_failed" for url in urls}
+
+def test_run_checks_keeps_previous_status_when_alert_is_throttled(monkeypatch):
+    import datetime
+    import login_monitor
+    url = "https://a.example/login"
+    monkeypatch.setattr(login_monitor, "last_alert_times", {url: datetime.datetime.now()})
+    monkeypatch.setattr(login_monitor, "monitor_url", lambda url: ("login_failed", "Status 200", 0.1))
+    monkeypatch.setattr(login_monitor, "write_last_status", lambda statuses: None)
+    monkeypatch.setattr(login_monitor, "send_pending_alerts", lambda emails, webex: None)
+
+    last_statuses = {url: "success"}
+    login_monitor.run_checks([url], last_statuses)
+
+    assert last_statuses == {url: "success"}
+
+def test_validate_env_vars_rejects_blank_login_url(monkeypatch):
+    import pytest
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "LOGIN_URLS", [" "])
+    with pytest.raises(SystemExit):
+        login_monitor.validate_env_vars()
+
+def test_run_checks_does_nothing_without_urls(monkeypatch):
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "write_last_status", lambda statuses: None)
+    last_statuses = {}
+    login_monitor.run_checks([], last_statuses)
+
+    assert last_statuses == {}
+
+def test_build_curl_command_redacts_quoted_password_in_json(monkeypatch):
+    import httpx
+    import login_monitor
+    monkeypatch.setattr(login_monitor, "PASSWORD", "it's-secret")
+    request = httpx.Request("POST", "https://example.com/login", json={"username": "admin", "password": "it's-secret"})
+    command = login_monitor.build_curl_command(request)
+
+    assert "secret" not in command
+    assert "********" in command
+
+def test_create_proxy_mounts_follows_proxy_environment(monkeypatch):
+    import login_monitor
+    monkeypatch.setenv("HTTPS_PROXY", "proxy.example:3128")
+    monkeypatch.setenv("NO_PROXY", "internal.example,localhost,intranet.example:8080,10.0.0.0/8,::1")
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    monkeypatch.delenv("ALL_PROXY", raising=False)
+    for name in ("http_proxy", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+
+    mounts = login_monitor._create_proxy_mounts()
+    assert set(mounts) == {
+        "https://", "all://*internal.example", "all://localhost",
+        "all://*intranet.example:8080", "all://10.0.0.0/8", "all://[::1]",
+    }
+    assert mounts["https://"] is not None
+    login_monitor.httpx.Client(transport=login_monitor.HTTP_TRANSPORT, mounts=mounts)  # Keys must be valid patterns
+
+    monkeypatch.setenv("NO_PROXY", "*")
+    assert login_monitor._create_proxy_mounts() == {}
+
+def test_check_login_reports_invalid_url_as_unreachable():
+    from login_monitor import check_login, create_client
+    status, detail, _ = check_login("http://[::1", create_client())
+    assert status == "unreachable"
+    assert detail
+
+def test_read_url_kinds_discards_malformed_entries(tmp_path, monkeypatch):
+    import login_monitor
+    url_kind_file = tmp_path / "url_kinds.json"
+    url_kind_file.write_text(
+        '{"https://a.example": {"payload": "json", "prefetch": false},'
+        ' "https://b.example": "json",'
+        ' "https://c.example": {"payload": "xml", "prefetch": true},'
+        ' "https://d.example": {"payload": "form"}}'
+    )
+    monkeypatch.setattr(login_monitor, "URL_KIND_FILE", str(url_kind_file))
+
+    assert login_monitor.read_url_kinds() == {"https://a.example": {"payload": "json", "prefetch": False}}